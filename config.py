@@ -60,6 +60,10 @@ class FloodHubConfig:
         # 4. Return None if no key found
         return None
     
+    def reload(self, api_key: Optional[str] = None) -> None:
+        """Refresh the API key in place, using api_key directly if given"""
+        self.api_key = api_key if api_key is not None else self._get_api_key()
+    
     def is_configured(self) -> bool:
         """Check if API is properly configured"""
         return self.api_key is not None
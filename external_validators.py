@@ -6,14 +6,24 @@ Cross-references Google Flood Hub data with Pakistani government sources
 
 import requests
 import pandas as pd
+import numpy as np
 import json
+import math
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from geopy.distance import geodesic
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Mean Earth radius used for haversine distances
+EARTH_RADIUS_KM = 6371.0
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km between two points given in degrees"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
 @dataclass
 class ExternalStation:
     """Data structure for external station references"""
@@ -33,6 +43,13 @@ class ExternalValidationService:
         self.ffd_stations = self._load_ffd_stations()
         self.pmd_stations = self._load_pmd_stations()
         self.ndma_stations = self._load_ndma_stations()
+        
+        # Station names and radian coordinates in find_matching_stations order, for batch validation
+        all_stations = (self.wapda_stations + self.ffd_stations +
+                        self.pmd_stations + self.ndma_stations)
+        self._station_names = np.array([station.name for station in all_stations], dtype=object)
+        self._station_lats_rad = np.radians([station.latitude for station in all_stations])
+        self._station_lons_rad = np.radians([station.longitude for station in all_stations])
     
     def _load_wapda_stations(self) -> List[ExternalStation]:
         """Load known WAPDA (Water and Power Development Authority) stations"""
@@ -163,7 +180,6 @@ class ExternalValidationService:
                              tolerance_km: float = 1.0) -> List[Dict]:
         """Find external stations within tolerance distance of gauge coordinates"""
         matches = []
-        gauge_coords = (gauge_lat, gauge_lon)
         
         # Check all external station sources
         all_stations = (self.wapda_stations + self.ffd_stations + 
@@ -171,8 +187,7 @@ class ExternalValidationService:
         
         for station in all_stations:
             try:
-                station_coords = (station.latitude, station.longitude)
-                distance = geodesic(gauge_coords, station_coords).kilometers
+                distance = _haversine_km(gauge_lat, gauge_lon, station.latitude, station.longitude)
                 
                 if distance <= tolerance_km:
                     matches.append({
@@ -238,6 +253,46 @@ class ExternalValidationService:
             'evidence': evidence
         }
     
+    def validate_gauges_batch(self, lat_arr: np.ndarray, lon_arr: np.ndarray
+                              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Validate many gauges at once; same outcome as validate_gauge_against_external per gauge
+        
+        Returns aligned (validation_status, confidence_boost, match_count, evidence) arrays.
+        Gauges with a NaN coordinate are reported as 'no_coordinates'.
+        """
+        lat_rad = np.radians(np.asarray(lat_arr, dtype=np.float64))[:, None]
+        lon_rad = np.radians(np.asarray(lon_arr, dtype=np.float64))[:, None]
+        
+        # (n_gauges, n_stations) haversine distances
+        a = (np.sin((self._station_lats_rad - lat_rad) / 2) ** 2
+             + np.cos(lat_rad) * np.cos(self._station_lats_rad) * np.sin((self._station_lons_rad - lon_rad) / 2) ** 2)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        
+        has_coords = np.isfinite(lat_rad[:, 0]) & np.isfinite(lon_rad[:, 0])
+        nearest = np.argmin(np.where(np.isnan(distances), np.inf, distances), axis=1)
+        min_dist = distances[np.arange(len(distances)), nearest]
+        
+        # Matches are counted once per tolerance tier, as in validate_gauge_against_external
+        match_count = ((distances <= 0.5).sum(axis=1) + (distances <= 1.0).sum(axis=1)
+                       + (distances <= 5.0).sum(axis=1))
+        
+        tiers = [~has_coords, min_dist <= 0.5, min_dist <= 1.0, min_dist <= 5.0]
+        status = np.select(tiers, ['no_coordinates', 'exact_match', 'close_match', 'nearby_match'],
+                           default='no_match').astype(object)
+        boost = np.select(tiers, [0, 40, 25, 10], default=0)
+        
+        nearest_names = self._station_names[nearest]
+        evidence = np.array([
+            'No coordinates available for validation' if s == 'no_coordinates'
+            else f"Exact match with {name}" if s == 'exact_match'
+            else f"Close match with {name} ({d:.2f}km)" if s == 'close_match'
+            else f"Nearby station: {name} ({d:.2f}km)" if s == 'nearby_match'
+            else 'No external station matches found'
+            for s, name, d in zip(status, nearest_names, min_dist)
+        ], dtype=object)
+        
+        return status, boost, match_count, evidence
+    
     def get_all_external_stations(self) -> pd.DataFrame:
         """Get DataFrame of all known external stations"""
         all_stations = (self.wapda_stations + self.ffd_stations + 
@@ -4,13 +4,21 @@ Enhanced Pakistan Flood Status Analyzer
 Integrates Google Flood Hub floodStatus API for real-time flood monitoring
 """
 
+import asyncio
+import hashlib
+import diskcache
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import orjson
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, field, fields, is_dataclass
+from collections import Counter
 from enum import Enum
 import logging
 
@@ -51,7 +59,27 @@ class InundationLevel(Enum):
     MEDIUM = "MEDIUM"
     LOW = "LOW"
 
-@dataclass
+# Value -> member lookups, cheaper than Enum construction in from_dict hot paths
+_SEVERITY_BY_VALUE = {e.value: e for e in Severity}
+_FORECAST_TREND_BY_VALUE = {e.value: e for e in ForecastTrend}
+_MAP_INFERENCE_TYPE_BY_VALUE = {e.value: e for e in MapInferenceType}
+_INUNDATION_MAP_TYPE_BY_VALUE = {e.value: e for e in InundationMapType}
+_INUNDATION_LEVEL_BY_VALUE = {e.value: e for e in InundationLevel}
+
+# Packed gauge coordinates, one record per flood status
+_COORD_DTYPE = np.dtype([('lat', 'f8'), ('lon', 'f8')])
+
+# Numeric risk level (0-4) per severity
+_RISK_LEVEL = {
+    Severity.NO_FLOODING: 0,
+    Severity.UNKNOWN: 1,
+    Severity.ABOVE_NORMAL: 2,
+    Severity.SEVERE: 3,
+    Severity.EXTREME: 4,
+    Severity.SEVERITY_UNSPECIFIED: 0
+}
+
+@dataclass(slots=True)
 class ValueChange:
     """Forecasted value change bounds"""
     lower_bound: float
@@ -59,12 +87,22 @@ class ValueChange:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'ValueChange':
+        try:
+            return cls(
+                lower_bound=data['lowerBound'],
+                upper_bound=data['upperBound']
+            )
+        except KeyError:
+            return cls._from_dict_lenient(data)
+    
+    @classmethod
+    def _from_dict_lenient(cls, data: Dict) -> 'ValueChange':
         return cls(
             lower_bound=data.get('lowerBound', 0.0),
             upper_bound=data.get('upperBound', 0.0)
         )
 
-@dataclass
+@dataclass(slots=True)
 class TimeRange:
     """Time range representation"""
     start: str
@@ -72,6 +110,16 @@ class TimeRange:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'TimeRange':
+        try:
+            return cls(
+                start=data['start'],
+                end=data['end']
+            )
+        except KeyError:
+            return cls._from_dict_lenient(data)
+    
+    @classmethod
+    def _from_dict_lenient(cls, data: Dict) -> 'TimeRange':
         return cls(
             start=data.get('start', ''),
             end=data.get('end', '')
@@ -87,7 +135,7 @@ class TimeRange:
         except Exception:
             return 0.0
 
-@dataclass
+@dataclass(slots=True)
 class ForecastChange:
     """Forecast change information"""
     value_change: ValueChange
@@ -100,7 +148,7 @@ class ForecastChange:
             reference_time_range=TimeRange.from_dict(data.get('referenceTimeRange', {}))
         )
 
-@dataclass
+@dataclass(slots=True)
 class InundationMap:
     """Single inundation map"""
     level: InundationLevel
@@ -109,27 +157,43 @@ class InundationMap:
     @classmethod
     def from_dict(cls, data: Dict) -> 'InundationMap':
         return cls(
-            level=InundationLevel(data.get('level', 'INUNDATION_LEVEL_UNSPECIFIED')),
+            level=_INUNDATION_LEVEL_BY_VALUE.get(data.get('level', ''), InundationLevel.INUNDATION_LEVEL_UNSPECIFIED),
             serialized_polygon_id=data.get('serializedPolygonId', '')
         )
 
-@dataclass
+@dataclass(slots=True)
 class InundationMapSet:
     """Set of inundation maps"""
-    inundation_maps: List[InundationMap]
+    # Raw API dicts (or InundationMap objects), parsed on demand by parsed_maps
+    inundation_maps: List[Union[Dict, InundationMap]]
     time_range: TimeRange
     map_type: InundationMapType
+    _parsed_maps: Optional[List[InundationMap]] = field(default=None, init=False, repr=False, compare=False)
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'InundationMapSet':
-        maps = [InundationMap.from_dict(m) for m in data.get('inundationMaps', [])]
         return cls(
-            inundation_maps=maps,
+            inundation_maps=data.get('inundationMaps', []),
             time_range=TimeRange.from_dict(data.get('inundationMapsTimeRange', {})),
-            map_type=InundationMapType(data.get('inundationMapType', 'INUNDATION_MAP_TYPE_UNSPECIFIED'))
+            map_type=_INUNDATION_MAP_TYPE_BY_VALUE.get(data.get('inundationMapType', ''), InundationMapType.INUNDATION_MAP_TYPE_UNSPECIFIED)
         )
+    
+    @property
+    def parsed_maps(self) -> List[InundationMap]:
+        """Inundation maps as InundationMap objects, built on first access"""
+        if self._parsed_maps is None:
+            self._parsed_maps = [
+                m if isinstance(m, InundationMap) else InundationMap.from_dict(m)
+                for m in self.inundation_maps
+            ]
+        return self._parsed_maps
+    
+    @property
+    def map_count(self) -> int:
+        """Number of inundation maps, without parsing them"""
+        return len(self.inundation_maps)
 
-@dataclass
+@dataclass(slots=True)
 class LatLng:
     """Geographic coordinates"""
     latitude: float
@@ -137,12 +201,22 @@ class LatLng:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'LatLng':
+        try:
+            return cls(
+                latitude=data['latitude'],
+                longitude=data['longitude']
+            )
+        except KeyError:
+            return cls._from_dict_lenient(data)
+    
+    @classmethod
+    def _from_dict_lenient(cls, data: Dict) -> 'LatLng':
         return cls(
             latitude=data.get('latitude', 0.0),
             longitude=data.get('longitude', 0.0)
         )
 
-@dataclass
+@dataclass(slots=True)
 class FloodStatus:
     """Complete flood status information"""
     gauge_id: str
@@ -160,6 +234,28 @@ class FloodStatus:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'FloodStatus':
+        # Well-formed API records carry every key; index directly and only
+        # fall back to defaulted lookups when something is missing or unknown
+        try:
+            return cls(
+                gauge_id=data['gaugeId'],
+                quality_verified=data['qualityVerified'],
+                gauge_location=LatLng.from_dict(data['gaugeLocation']),
+                issued_time=data['issuedTime'],
+                forecast_time_range=TimeRange.from_dict(data['forecastTimeRange']),
+                forecast_change=ForecastChange.from_dict(data['forecastChange']) if 'forecastChange' in data else None,
+                forecast_trend=_FORECAST_TREND_BY_VALUE[data['forecastTrend']],
+                map_inference_type=_MAP_INFERENCE_TYPE_BY_VALUE[data['mapInferenceType']],
+                severity=_SEVERITY_BY_VALUE[data['severity']],
+                inundation_map_set=InundationMapSet.from_dict(data['inundationMapSet']) if 'inundationMapSet' in data else None,
+                source=data['source'],
+                serialized_notification_polygon_id=data['serializedNotificationPolygonId']
+            )
+        except KeyError:
+            return cls._from_dict_lenient(data)
+    
+    @classmethod
+    def _from_dict_lenient(cls, data: Dict) -> 'FloodStatus':
         return cls(
             gauge_id=data.get('gaugeId', ''),
             quality_verified=data.get('qualityVerified', False),
@@ -167,9 +263,9 @@ class FloodStatus:
             issued_time=data.get('issuedTime', ''),
             forecast_time_range=TimeRange.from_dict(data.get('forecastTimeRange', {})),
             forecast_change=ForecastChange.from_dict(data['forecastChange']) if 'forecastChange' in data else None,
-            forecast_trend=ForecastTrend(data.get('forecastTrend', 'FORECAST_TREND_UNSPECIFIED')),
-            map_inference_type=MapInferenceType(data.get('mapInferenceType', 'MAP_INFERENCE_TYPE_UNSPECIFIED')),
-            severity=Severity(data.get('severity', 'SEVERITY_UNSPECIFIED')),
+            forecast_trend=_FORECAST_TREND_BY_VALUE.get(data.get('forecastTrend', ''), ForecastTrend.FORECAST_TREND_UNSPECIFIED),
+            map_inference_type=_MAP_INFERENCE_TYPE_BY_VALUE.get(data.get('mapInferenceType', ''), MapInferenceType.MAP_INFERENCE_TYPE_UNSPECIFIED),
+            severity=_SEVERITY_BY_VALUE.get(data.get('severity', ''), Severity.SEVERITY_UNSPECIFIED),
             inundation_map_set=InundationMapSet.from_dict(data['inundationMapSet']) if 'inundationMapSet' in data else None,
             source=data.get('source', ''),
             serialized_notification_polygon_id=data.get('serializedNotificationPolygonId', '')
@@ -183,25 +279,24 @@ class FloodStatus:
     @property
     def has_inundation_maps(self) -> bool:
         """Check if inundation maps are available"""
-        return self.inundation_map_set is not None and len(self.inundation_map_set.inundation_maps) > 0
+        return self.inundation_map_set is not None and self.inundation_map_set.map_count > 0
     
     @property
     def risk_level(self) -> int:
         """Get numeric risk level (0-4)"""
-        risk_mapping = {
-            Severity.NO_FLOODING: 0,
-            Severity.UNKNOWN: 1,
-            Severity.ABOVE_NORMAL: 2,
-            Severity.SEVERE: 3,
-            Severity.EXTREME: 4,
-            Severity.SEVERITY_UNSPECIFIED: 0
-        }
-        return risk_mapping.get(self.severity, 0)
+        return _RISK_LEVEL.get(self.severity, 0)
 
 class FloodStatusAnalyzer:
     """Enhanced analyzer for flood status data"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Conditional-poll responses kept for ETag revalidation, oldest evicted first
+    RESPONSE_CACHE_MAX_ENTRIES = 32
+    
+    # Bump when the report layout changes so older cached reports are not served
+    REPORT_FORMAT_VERSION = 1
+    REPORT_CACHE_TTL_SECONDS = 6 * 3600
+    
+    def __init__(self, api_key: Optional[str] = None, report_cache_dir: Optional[str] = None):
         self.api_key = api_key
         self.base_url = "https://floodforecasting.googleapis.com"
         
@@ -212,6 +307,50 @@ class FloodStatusAnalyzer:
             "min_lon": 60.5,
             "max_lon": 77.5
         }
+        
+        # Pooled keep-alive session shared by every poll
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.2, allowed_methods=frozenset({'POST'}))
+        )
+        self.session.mount('https://', adapter)
+        
+        # (url, payload, credentials) -> (ETag, raw body) for conditional re-polls
+        self._response_cache: Dict[Tuple[str, bytes, bytes], Tuple[str, bytes]] = {}
+        
+        # Reports keyed by a digest of their input statuses; only used when a
+        # cache directory is given, and opened on first use
+        self.report_cache_dir = report_cache_dir
+        self._report_cache: Optional[diskcache.Cache] = None
+    
+    def _post_json(self, url: str, payload: Dict, params: Optional[Dict] = None,
+                   headers: Optional[Dict] = None) -> Dict:
+        """POST a query and parse the JSON body, revalidating cached responses via ETag"""
+        # The API key travels in params or the Authorization header; keying on both
+        # means a body fetched under another key is never revalidated
+        cache_key = (url, orjson.dumps(payload, option=orjson.OPT_SORT_KEYS),
+                     orjson.dumps({'params': params or {}, 'headers': headers or {}},
+                                  option=orjson.OPT_SORT_KEYS))
+        headers = dict(headers or {})
+        cached = self._response_cache.get(cache_key)
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        
+        response = self.session.post(url, json=payload, params=params, headers=headers, timeout=30)
+        if cached and response.status_code == 304:
+            logger.info("Flood status unchanged since last poll, reusing cached response")
+            return orjson.loads(cached[1])
+        response.raise_for_status()
+        
+        etag = response.headers.get('ETag')
+        if etag:
+            self._response_cache.pop(cache_key, None)
+            if len(self._response_cache) >= self.RESPONSE_CACHE_MAX_ENTRIES:
+                del self._response_cache[next(iter(self._response_cache))]
+            self._response_cache[cache_key] = (etag, response.content)
+        return orjson.loads(response.content)
     
     def fetch_flood_status_by_area(self) -> List[FloodStatus]:
         """Fetch flood status for Pakistani region"""
@@ -230,10 +369,7 @@ class FloodStatusAnalyzer:
                 params["key"] = self.api_key
             
             logger.info(f"Fetching flood status from: {url}")
-            response = requests.post(url, json=payload, params=params, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._post_json(url, payload, params=params, headers=headers)
             flood_statuses = []
             
             for status_data in data.get('floodStatuses', []):
@@ -263,10 +399,7 @@ class FloodStatusAnalyzer:
                 headers["Authorization"] = f"Bearer {self.api_key}"
             
             logger.info(f"Fetching flood status for {len(gauge_ids)} gauges")
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._post_json(url, payload, headers=headers)
             flood_statuses = []
             
             for status_data in data.get('floodStatuses', []):
@@ -282,6 +415,56 @@ class FloodStatusAnalyzer:
             logger.error(f"JSON decode error: {e}")
             return self._get_sample_flood_status()
     
+    async def fetch_flood_status_by_gauge_ids_async(self, gauge_ids: List[str],
+                                                    chunk_size: int = 100) -> List[FloodStatus]:
+        """Fetch flood status for many gauge IDs as concurrent chunked requests"""
+        try:
+            url = f"{self.base_url}/v1/floodStatus:queryLatestFloodStatusByGaugeIds"
+            
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            
+            chunks = [gauge_ids[i:i + chunk_size] for i in range(0, len(gauge_ids), chunk_size)]
+            logger.info(f"Fetching flood status for {len(gauge_ids)} gauges in {len(chunks)} concurrent requests")
+            
+            async with httpx.AsyncClient(http2=True, timeout=30) as client:
+                responses = await asyncio.gather(*(
+                    client.post(url, json={"gaugeIds": chunk}, headers=headers)
+                    for chunk in chunks
+                ))
+            
+            flood_statuses = []
+            for response in responses:
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                for status_data in data.get('floodStatuses', []):
+                    flood_statuses.append(FloodStatus.from_dict(status_data))
+            
+            logger.info(f"Found {len(flood_statuses)} flood status records")
+            return flood_statuses
+            
+        except httpx.HTTPError as e:
+            logger.error(f"API request failed: {e}")
+            return self._get_sample_flood_status()
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error: {e}")
+            return self._get_sample_flood_status()
+    
+    def fetch_flood_status_by_gauge_ids_batched(self, gauge_ids: List[str],
+                                                chunk_size: int = 100) -> List[FloodStatus]:
+        """Synchronous wrapper around fetch_flood_status_by_gauge_ids_async"""
+        return asyncio.run(self.fetch_flood_status_by_gauge_ids_async(gauge_ids, chunk_size))
+    
+    @staticmethod
+    def _coordinates(flood_statuses: List[FloodStatus]) -> np.ndarray:
+        """Packed lat/lon array for the statuses"""
+        return np.fromiter(
+            ((s.gauge_location.latitude, s.gauge_location.longitude) for s in flood_statuses),
+            dtype=_COORD_DTYPE,
+            count=len(flood_statuses)
+        )
+    
     def _get_sample_flood_status(self) -> List[FloodStatus]:
         """Sample flood status data for testing"""
         sample_data = [
@@ -370,61 +553,77 @@ class FloodStatusAnalyzer:
             'risk_assessment': {}
         }
         
-        # Severity distribution
-        severity_counts = {}
-        for status in flood_statuses:
-            severity = status.severity.value
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
-        analysis['severity_distribution'] = severity_counts
+        # Single pass over the statuses, updating every aggregate at once
+        severity_counts = Counter()
+        trend_counts = Counter()
+        source_counts = Counter()
+        quality_verified = 0
+        model_based = 0
+        image_classification = 0
+        with_maps = 0
+        active_floods = 0
+        risk_sum = 0
+        risk_max = 0
+        high_risk = 0
         
-        # Trend analysis
-        trend_counts = {}
         for status in flood_statuses:
-            trend = status.forecast_trend.value
-            trend_counts[trend] = trend_counts.get(trend, 0) + 1
-        analysis['trend_analysis'] = trend_counts
+            severity_counts[status.severity] += 1
+            trend_counts[status.forecast_trend] += 1
+            source_counts[status.source] += 1
+            
+            if status.quality_verified:
+                quality_verified += 1
+            if status.map_inference_type == MapInferenceType.MODEL:
+                model_based += 1
+            elif status.map_inference_type == MapInferenceType.IMAGE_CLASSIFICATION:
+                image_classification += 1
+            if status.has_inundation_maps:
+                with_maps += 1
+            if status.is_active_flood:
+                active_floods += 1
+            
+            risk = status.risk_level
+            risk_sum += risk
+            if risk > risk_max:
+                risk_max = risk
+            if risk >= 3:
+                high_risk += 1
+        
+        total = len(flood_statuses)
+        
+        # Counted by member; resolve .value once per distinct key, not per status
+        analysis['severity_distribution'] = {sev.value: n for sev, n in severity_counts.items()}
+        analysis['trend_analysis'] = {trend.value: n for trend, n in trend_counts.items()}
         
-        # Quality analysis
-        quality_verified = sum(1 for s in flood_statuses if s.quality_verified)
         analysis['quality_analysis'] = {
             'quality_verified': quality_verified,
-            'quality_verified_percentage': (quality_verified / len(flood_statuses)) * 100,
-            'model_based': sum(1 for s in flood_statuses if s.map_inference_type == MapInferenceType.MODEL),
-            'image_classification': sum(1 for s in flood_statuses if s.map_inference_type == MapInferenceType.IMAGE_CLASSIFICATION)
+            'quality_verified_percentage': (quality_verified / total) * 100,
+            'model_based': model_based,
+            'image_classification': image_classification
         }
         
-        # Source analysis
-        source_counts = {}
-        for status in flood_statuses:
-            source = status.source
-            source_counts[source] = source_counts.get(source, 0) + 1
-        analysis['source_analysis'] = source_counts
+        analysis['source_analysis'] = dict(source_counts)
         
-        # Geographic analysis
-        latitudes = [s.gauge_location.latitude for s in flood_statuses]
-        longitudes = [s.gauge_location.longitude for s in flood_statuses]
+        coords = self._coordinates(flood_statuses)
+        lats = coords['lat']
+        lons = coords['lon']
         analysis['geographic_analysis'] = {
-            'latitude_range': [min(latitudes), max(latitudes)],
-            'longitude_range': [min(longitudes), max(longitudes)],
-            'center_point': [sum(latitudes)/len(latitudes), sum(longitudes)/len(longitudes)]
+            'latitude_range': [float(lats.min()), float(lats.max())],
+            'longitude_range': [float(lons.min()), float(lons.max())],
+            'center_point': [float(lats.mean()), float(lons.mean())]
         }
         
-        # Inundation map analysis
-        with_maps = sum(1 for s in flood_statuses if s.has_inundation_maps)
         analysis['inundation_analysis'] = {
             'gauges_with_maps': with_maps,
-            'map_coverage_percentage': (with_maps / len(flood_statuses)) * 100
+            'map_coverage_percentage': (with_maps / total) * 100
         }
         
-        # Risk assessment
-        active_floods = sum(1 for s in flood_statuses if s.is_active_flood)
-        risk_levels = [s.risk_level for s in flood_statuses]
         analysis['risk_assessment'] = {
             'active_floods': active_floods,
-            'active_flood_percentage': (active_floods / len(flood_statuses)) * 100,
-            'average_risk_level': sum(risk_levels) / len(risk_levels),
-            'max_risk_level': max(risk_levels),
-            'high_risk_gauges': sum(1 for r in risk_levels if r >= 3)
+            'active_flood_percentage': (active_floods / total) * 100,
+            'average_risk_level': risk_sum / total,
+            'max_risk_level': risk_max,
+            'high_risk_gauges': high_risk
         }
         
         return analysis
@@ -433,8 +632,22 @@ class FloodStatusAnalyzer:
         """Convert flood status list to pandas DataFrame"""
         data = []
         
-        for status in flood_statuses:
-            row = {
+        # Parse all forecast windows in one vectorized call rather than per row
+        starts = pd.to_datetime([s.forecast_time_range.start for s in flood_statuses],
+                                utc=True, format='ISO8601', errors='coerce')
+        ends = pd.to_datetime([s.forecast_time_range.end for s in flood_statuses],
+                              utc=True, format='ISO8601', errors='coerce')
+        durations = ((ends - starts).total_seconds() / 3600).fillna(0.0)
+        
+        # Optional sub-records go into typed arrays so the columns stay numeric
+        n = len(flood_statuses)
+        change_lower = np.full(n, np.nan)
+        change_upper = np.full(n, np.nan)
+        map_types = np.full(n, None, dtype=object)
+        map_counts = np.zeros(n, dtype=np.int64)
+        
+        for i, (status, duration_hours) in enumerate(zip(flood_statuses, durations)):
+            data.append({
                 'gaugeId': status.gauge_id,
                 'latitude': status.gauge_location.latitude,
                 'longitude': status.gauge_location.longitude,
@@ -447,33 +660,49 @@ class FloodStatusAnalyzer:
                 'riskLevel': status.risk_level,
                 'isActiveFlood': status.is_active_flood,
                 'hasInundationMaps': status.has_inundation_maps,
-                'forecastDurationHours': status.forecast_time_range.duration_hours
-            }
+                'forecastDurationHours': duration_hours
+            })
             
             # Add forecast change data if available
-            if status.forecast_change:
-                row['forecastChangeLower'] = status.forecast_change.value_change.lower_bound
-                row['forecastChangeUpper'] = status.forecast_change.value_change.upper_bound
-            else:
-                row['forecastChangeLower'] = None
-                row['forecastChangeUpper'] = None
+            forecast_change = status.forecast_change
+            if forecast_change is not None:
+                change_lower[i] = forecast_change.value_change.lower_bound
+                change_upper[i] = forecast_change.value_change.upper_bound
             
             # Add inundation map data if available
-            if status.inundation_map_set:
-                row['inundationMapType'] = status.inundation_map_set.map_type.value
-                row['inundationMapCount'] = len(status.inundation_map_set.inundation_maps)
-            else:
-                row['inundationMapType'] = None
-                row['inundationMapCount'] = 0
-            
-            data.append(row)
+            map_set = status.inundation_map_set
+            if map_set is not None:
+                map_types[i] = map_set.map_type.value
+                map_counts[i] = map_set.map_count
         
-        return pd.DataFrame(data)
+        df = pd.DataFrame(data)
+        df['forecastChangeLower'] = change_lower
+        df['forecastChangeUpper'] = change_upper
+        df['inundationMapType'] = pd.Categorical(map_types, categories=[t.value for t in InundationMapType])
+        df['inundationMapCount'] = map_counts
+        
+        return df
+    
+    @property
+    def report_cache(self) -> Optional[diskcache.Cache]:
+        """On-disk report cache, or None when no cache directory was given"""
+        if self._report_cache is None and self.report_cache_dir is not None:
+            self._report_cache = diskcache.Cache(self.report_cache_dir)
+        return self._report_cache
     
     def generate_flood_status_report(self, flood_statuses: List[FloodStatus]) -> Dict:
         """Generate comprehensive flood status report"""
+        # Identical statuses produce the same report apart from its timestamp, so reuse it
+        report_cache = self.report_cache
+        if report_cache is not None:
+            cache_key = self._report_cache_key(flood_statuses)
+            cached_report = report_cache.get(cache_key)
+            if cached_report is not None:
+                logger.info("Flood statuses unchanged, reusing cached report")
+                cached_report['detailed_analysis']['analysis_time'] = datetime.now().isoformat()
+                return cached_report
+        
         analysis = self.analyze_flood_patterns(flood_statuses)
-        df = self.create_flood_status_dataframe(flood_statuses)
         
         # Enhanced analysis
         report = {
@@ -484,13 +713,29 @@ class FloodStatusAnalyzer:
                 'average_risk_level': round(analysis['risk_assessment']['average_risk_level'], 2)
             },
             'detailed_analysis': analysis,
-            'recommendations': self._generate_flood_recommendations(analysis, df),
+            'recommendations': self._generate_flood_recommendations(analysis),
             'alert_priorities': self._prioritize_alerts(flood_statuses)
         }
         
+        if report_cache is not None:
+            report_cache.set(cache_key, report, expire=self.REPORT_CACHE_TTL_SECONDS)
         return report
     
-    def _generate_flood_recommendations(self, analysis: Dict, df: pd.DataFrame) -> Dict:
+    @classmethod
+    def _report_cache_key(cls, flood_statuses: List[FloodStatus]) -> str:
+        """Digest of the report format version and the statuses' compared fields
+        (lazily cached state excluded)"""
+        def compared_fields(obj):
+            if is_dataclass(obj):
+                return {f.name: getattr(obj, f.name) for f in fields(obj) if f.compare}
+            raise TypeError(f"Cannot serialize {type(obj).__name__}")
+        
+        payload = orjson.dumps(flood_statuses, default=compared_fields,
+                               option=orjson.OPT_PASSTHROUGH_DATACLASS)
+        digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        return f"v{cls.REPORT_FORMAT_VERSION}:{digest}"
+    
+    def _generate_flood_recommendations(self, analysis: Dict) -> Dict:
         """Generate actionable recommendations based on flood analysis"""
         recommendations = {}
         
@@ -525,48 +770,48 @@ class FloodStatusAnalyzer:
     
     def _prioritize_alerts(self, flood_statuses: List[FloodStatus]) -> List[Dict]:
         """Prioritize flood alerts by risk and reliability"""
-        priorities = []
+        active = [s for s in flood_statuses if s.is_active_flood]
+        if not active:
+            return []
         
-        for status in flood_statuses:
-            if not status.is_active_flood:
-                continue
-            
-            priority_score = status.risk_level * 10
-            
-            # Boost score for quality verified
-            if status.quality_verified:
-                priority_score += 20
-            
-            # Boost score for model-based inference
-            if status.map_inference_type == MapInferenceType.MODEL:
-                priority_score += 15
-            
-            # Boost score for inundation maps
-            if status.has_inundation_maps:
-                priority_score += 10
-            
-            # Boost score for rising trend
-            if status.forecast_trend == ForecastTrend.RISE:
-                priority_score += 5
-            
+        # Risk level plus boosts for quality verified, model-based inference,
+        # inundation maps and rising trend
+        scores = np.fromiter(
+            (s.risk_level * 10
+             + 20 * s.quality_verified
+             + 15 * (s.map_inference_type is MapInferenceType.MODEL)
+             + 10 * s.has_inundation_maps
+             + 5 * (s.forecast_trend is ForecastTrend.RISE)
+             for s in active),
+            dtype=np.int16,
+            count=len(active)
+        )
+        
+        # Top 10 by score (highest first), ties kept in input order
+        candidates = np.arange(len(active))
+        if len(active) > 10:
+            cutoff = np.partition(scores, -10)[-10]
+            candidates = np.flatnonzero(scores >= cutoff)
+        top_idx = candidates[np.argsort(-scores[candidates], kind='stable')][:10]
+        
+        priorities = []
+        for i in top_idx:
+            status = active[i]
             priorities.append({
                 'gaugeId': status.gauge_id,
                 'severity': status.severity.value,
                 'location': f"{status.gauge_location.latitude:.3f}, {status.gauge_location.longitude:.3f}",
-                'priority_score': priority_score,
+                'priority_score': int(scores[i]),
                 'quality_verified': status.quality_verified,
                 'has_maps': status.has_inundation_maps,
                 'source': status.source
             })
         
-        # Sort by priority score (highest first)
-        priorities.sort(key=lambda x: x['priority_score'], reverse=True)
-        
-        return priorities[:10]  # Top 10 priorities
+        return priorities
 
 def main():
     """Test the flood status analyzer"""
-    analyzer = FloodStatusAnalyzer()
+    analyzer = FloodStatusAnalyzer(report_cache_dir='.flood_report_cache')
     
     # Fetch flood status data
     flood_statuses = analyzer.fetch_flood_status_by_area()
@@ -589,8 +834,8 @@ def main():
     # Save report
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f'flood_status_report_{timestamp}.json'
-    with open(filename, 'w') as f:
-        json.dump(report, f, indent=2, default=str)
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY, default=str))
     print(f"\nReport saved to {filename}")
 
 if __name__ == "__main__":
@@ -7,10 +7,39 @@ from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.oxml.shared import OxmlElement, qn
 from docx.shared import RGBColor
 import re
+from collections import deque
 from datetime import datetime
+from xml.sax.saxutils import escape
+
+# Inline bold / italic / code markers, stripped in a single scan
+_MD_INLINE = re.compile(r'\*\*(.*?)\*\*|\*(.*?)\*|`(.*?)`')
+# The ordered bold -> italic -> code passes, for text mixing asterisks and backticks
+_MD_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_MD_ITALIC = re.compile(r'\*(.*?)\*')
+_MD_CODE = re.compile(r'`(.*?)`')
+_BOLD_SPLIT = re.compile(r'(\*\*.*?\*\*)')
+_BULLET = re.compile(r'^[-*]\s')
+_NUMBERED = re.compile(r'^\d+\.')
+_NUM_PREFIX = re.compile(r'^\d+\.\s*')
+
+# List runs longer than this are written as raw paragraph XML in one parse
+_BULK_LIST_THRESHOLD = 20
+
+def _is_plain_run_text(text):
+    """Whether add_run(text) would emit a bare <w:t> (no tabs, breaks or edge whitespace)"""
+    return bool(text) and text == text.strip() and not any(c in text for c in '\t\n\r')
+
+def _strip_inline(match):
+    """Replacement for _MD_INLINE: keep the marked text, cleaning bold/italic contents too"""
+    inner = match.group(match.lastindex)
+    if match.lastindex == 3:
+        return inner
+    return _MD_INLINE.sub(_strip_inline, inner)
 
 def create_professional_word_document(markdown_file, output_file):
     """Convert markdown to professionally formatted Word document"""
@@ -29,12 +58,9 @@ def create_professional_word_document(markdown_file, output_file):
         section.left_margin = Inches(1.25)
         section.right_margin = Inches(1.25)
     
-    # Read and process markdown content
+    # Stream and process markdown content line by line
     with open(markdown_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Process content
-    process_markdown_content(doc, content)
+        process_markdown_content(doc, f)
     
     # Add professional footer
     add_footer(doc)
@@ -66,122 +92,206 @@ def setup_document_styles(doc):
     subtitle_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
     subtitle_style.paragraph_format.space_after = Pt(18)
 
-def process_markdown_content(doc, content):
+def _next_line(lines, pending):
+    """Next raw line, taking pushed-back lines first; None at end of input"""
+    if pending:
+        return pending.popleft()
+    return next(lines, None)
+
+def _add_title(doc, raw_line, text, ctx):
+    """'# ' main title"""
+    doc.add_paragraph(clean_text(text.strip()), style=ctx['title_style'])
+
+def _add_subtitle(doc, raw_line, text, ctx):
+    """'## ' subtitle"""
+    doc.add_paragraph(clean_text(text.strip()), style=ctx['subtitle_style'])
+
+def _add_section_heading(doc, raw_line, text, ctx):
+    """'### ' section heading"""
+    doc.add_paragraph(clean_text(text.strip()), style=ctx['h1_style'])
+
+def _add_subsection_heading(doc, raw_line, text, ctx):
+    """'#### ' subsection heading"""
+    doc.add_paragraph(clean_text(text.strip()), style=ctx['h2_style'])
+
+def _add_separator(doc, raw_line, text, ctx):
+    """'---' page break or separator"""
+    if not ctx['is_first_line']:  # Don't add break at start
+        doc.add_page_break()
+
+def _add_bullets(doc, raw_line, text, ctx):
+    """'- ' / '* ' bullet points, consumed as a run"""
+    ctx['pending'].appendleft(raw_line)
+    process_bullet_list(doc, ctx['lines'], ctx['pending'], ctx['bullet_style'])
+
+# Line handlers keyed on the first space-delimited token of the line
+_HANDLERS = {
+    '#': _add_title,
+    '##': _add_subtitle,
+    '###': _add_section_heading,
+    '####': _add_subsection_heading,
+    '---': _add_separator,
+    '-': _add_bullets,
+    '*': _add_bullets,
+}
+
+def process_markdown_content(doc, line_iter):
     """Process markdown content with proper formatting"""
     
-    lines = content.split('\n')
-    i = 0
+    lines = iter(line_iter)
+    pending = deque()  # look-ahead lines handed back by the list processors
+    at_start = True
     
-    while i < len(lines):
-        line = lines[i].strip()
+    # Resolve styles once instead of looking them up by name per paragraph
+    ctx = {
+        'lines': lines,
+        'pending': pending,
+        'is_first_line': True,
+        'title_style': doc.styles['Custom Title'],
+        'subtitle_style': doc.styles['Custom Subtitle'],
+        'h1_style': doc.styles['Heading 1'],
+        'h2_style': doc.styles['Heading 2'],
+        'bullet_style': doc.styles['List Bullet'],
+    }
+    number_style = doc.styles['List Number']
+    
+    while True:
+        raw_line = _next_line(lines, pending)
+        if raw_line is None:
+            break
+        
+        line = raw_line.strip()
+        ctx['is_first_line'] = at_start
+        at_start = False
         
         if not line:
-            i += 1
-            continue
-            
-        if line.startswith('# '):
-            # Main title
-            title = clean_text(line[2:].strip())
-            p = doc.add_paragraph(title, style='Custom Title')
-            
-        elif line.startswith('## '):
-            # Subtitle
-            subtitle = clean_text(line[3:].strip())
-            p = doc.add_paragraph(subtitle, style='Custom Subtitle')
-            
-        elif line.startswith('### '):
-            # Section heading
-            heading = clean_text(line[4:].strip())
-            doc.add_heading(heading, level=1)
-            
-        elif line.startswith('#### '):
-            # Subsection heading
-            heading = clean_text(line[5:].strip())
-            doc.add_heading(heading, level=2)
-            
-        elif line.startswith('---'):
-            # Page break or separator
-            if i > 0:  # Don't add break at start
-                doc.add_page_break()
-            
-        elif line.startswith('- ') or line.startswith('* '):
-            # Bullet points
-            i = process_bullet_list(doc, lines, i)
             continue
+        
+        token, _, text = line.partition(' ')
+        if token.startswith('---'):
+            # Any line opening with a rule marker is a separator
+            token = '---'
+        handler = _HANDLERS.get(token)
+        if handler is not None and (text or token == '---'):
+            handler(doc, raw_line, text, ctx)
             
-        elif re.match(r'^\d+\.', line):
+        elif _NUMBERED.match(line):
             # Numbered list
-            i = process_numbered_list(doc, lines, i)
-            continue
+            pending.appendleft(raw_line)
+            process_numbered_list(doc, lines, pending, number_style)
             
         else:
             # Regular paragraph
-            if line:
-                para_text = clean_text(line)
-                if para_text:
-                    p = doc.add_paragraph()
-                    add_formatted_text(p, para_text)
-        
-        i += 1
+            runs = formatted_runs(line)
+            if runs:
+                p = doc.add_paragraph()
+                add_formatted_text(p, runs)
+
+def _strip_markdown(text):
+    """Remove bold, italic and inline code markers plus any stray asterisks"""
+    # With only one kind of marker the single scan matches the ordered passes
+    # (every '*' is dropped either way); when both appear, overlapping spans
+    # such as '*`a*`b`' resolve differently, so keep the original pass order
+    if '*' in text and '`' in text:
+        text = _MD_BOLD.sub(r'\1', text)
+        text = _MD_ITALIC.sub(r'\1', text)
+        return _MD_CODE.sub(r'\1', text).replace('*', '')
+    return _MD_INLINE.sub(_strip_inline, text).replace('*', '')
 
 def clean_text(text):
     """Remove markdown formatting artifacts"""
-    # Remove bold markers
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-    
-    # Remove italic markers  
-    text = re.sub(r'\*(.*?)\*', r'\1', text)
-    
-    # Remove inline code markers
-    text = re.sub(r'`(.*?)`', r'\1', text)
-    
-    # Clean up any remaining markdown artifacts
-    text = text.replace('**', '').replace('*', '')
-    
-    return text.strip()
+    return _strip_markdown(text).strip()
 
-def add_formatted_text(paragraph, text):
-    """Add text with inline formatting"""
+def formatted_runs(text):
+    """Split a paragraph into (text, bold) runs, cleaning markdown inside each run"""
+    runs = []
+    for part in _BOLD_SPLIT.split(text):
+        if part.startswith('**') and part.endswith('**') and len(part) >= 4:
+            content, bold = _strip_markdown(part[2:-2]), True
+        else:
+            content, bold = _strip_markdown(part), False
+        if content:
+            runs.append((content, bold))
     
-    # Split by potential bold markers that weren't cleaned
-    parts = re.split(r'(\*\*.*?\*\*)', text)
+    # Trim the paragraph edges the way clean_text would
+    while runs and not runs[0][0].strip():
+        runs.pop(0)
+    while runs and not runs[-1][0].strip():
+        runs.pop()
+    if runs:
+        runs[0] = (runs[0][0].lstrip(), runs[0][1])
+        runs[-1] = (runs[-1][0].rstrip(), runs[-1][1])
+    return runs
+
+def add_formatted_text(paragraph, runs):
+    """Add (text, bold) runs to a paragraph"""
+    for content, bold in runs:
+        run = paragraph.add_run(content)
+        if bold:
+            run.bold = True
+
+def add_list_paragraphs(doc, texts, style):
+    """Add one styled paragraph per list item; long runs bypass the per-paragraph API"""
+    if len(texts) <= _BULK_LIST_THRESHOLD:
+        for text in texts:
+            doc.add_paragraph(text, style=style)
+        return
     
-    for part in parts:
-        if part.startswith('**') and part.endswith('**'):
-            # Bold text
-            content = part[2:-2]
-            if content:
-                run = paragraph.add_run(content)
-                run.bold = True
+    if isinstance(style, str):
+        style = doc.styles[style]
+    # Items python-docx would encode specially (<w:tab/>, <w:br/>, xml:space)
+    # still go through add_paragraph, in their original position
+    paragraph_xml = ''.join(
+        f'<w:p><w:pPr><w:pStyle w:val="{style.style_id}"/></w:pPr>'
+        f'<w:r><w:t>{escape(text)}</w:t></w:r></w:p>'
+        for text in texts if _is_plain_run_text(text)
+    )
+    plain_paragraphs = iter(parse_xml(f'<w:body {nsdecls("w")}>{paragraph_xml}</w:body>'))
+    sect_pr = doc.element.body.sectPr
+    for text in texts:
+        if not _is_plain_run_text(text):
+            doc.add_paragraph(text, style=style)
+            continue
+        p = next(plain_paragraphs)
+        if sect_pr is not None:
+            sect_pr.addprevious(p)
         else:
-            # Regular text
-            if part:
-                paragraph.add_run(part)
+            doc.element.body.append(p)
 
-def process_bullet_list(doc, lines, start_index):
-    """Process bullet list items"""
-    i = start_index
-    
-    while i < len(lines) and (lines[i].strip().startswith('- ') or lines[i].strip().startswith('* ')):
-        bullet_text = clean_text(lines[i].strip()[2:])
+def process_bullet_list(doc, lines, pending, style='List Bullet'):
+    """Process bullet list items, pushing back the first non-bullet line"""
+    items = []
+    while True:
+        raw_line = _next_line(lines, pending)
+        if raw_line is None:
+            break
+        line = raw_line.strip()
+        if not _BULLET.match(line):
+            pending.appendleft(raw_line)
+            break
+        
+        bullet_text = clean_text(line[2:])
         if bullet_text:
-            doc.add_paragraph(bullet_text, style='List Bullet')
-        i += 1
-    
-    return i
+            items.append(bullet_text)
+    add_list_paragraphs(doc, items, style)
 
-def process_numbered_list(doc, lines, start_index):
-    """Process numbered list items"""
-    i = start_index
-    
-    while i < len(lines) and re.match(r'^\d+\.', lines[i].strip()):
-        number_text = re.sub(r'^\d+\.\s*', '', lines[i].strip())
+def process_numbered_list(doc, lines, pending, style='List Number'):
+    """Process numbered list items, pushing back the first non-numbered line"""
+    items = []
+    while True:
+        raw_line = _next_line(lines, pending)
+        if raw_line is None:
+            break
+        line = raw_line.strip()
+        if not _NUMBERED.match(line):
+            pending.appendleft(raw_line)
+            break
+        
+        number_text = _NUM_PREFIX.sub('', line)
         number_text = clean_text(number_text)
         if number_text:
-            doc.add_paragraph(number_text, style='List Number')
-        i += 1
-    
-    return i
+            items.append(number_text)
+    add_list_paragraphs(doc, items, style)
 
 def add_footer(doc):
     """Add professional footer"""
@@ -5,12 +5,20 @@ Combines classification, external validation, and reporting
 """
 
 import pandas as pd
-import json
+import numpy as np
+import orjson
 import logging
 from datetime import datetime
 from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 
+try:
+    import pyarrow  # noqa: F401 - parquet engine for DataFrame.to_parquet
+    _PYARROW_AVAILABLE = True
+except ImportError:
+    _PYARROW_AVAILABLE = False
+
 from gauge_analyzer import PakistanGaugeAnalyzer, GaugeClassification
 from external_validators import ExternalValidationService
 
@@ -18,6 +26,20 @@ from external_validators import ExternalValidationService
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _value_counts_dict(series: pd.Series) -> Dict:
+    """value_counts() as a plain {label: count} dict, most frequent first"""
+    counts = series.value_counts()
+    return dict(zip(counts.index.to_numpy().tolist(), counts.to_numpy().tolist()))
+
+def _write_json(filename: str, data: Dict):
+    """Write a report dict as indented JSON"""
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(
+            data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            default=str
+        ))
+
 class IntegratedGaugeAnalyzer:
     """Integrated analysis system combining all components"""
     
@@ -39,13 +61,17 @@ class IntegratedGaugeAnalyzer:
         logger.info("Step 2: Adding external validation...")
         validated_df = self._add_external_validation(gauge_df)
         
+        # One timestamp shared by the report, its markdown and the output file names
+        analysis_time = datetime.now()
+        
         # Step 3: Generate comprehensive reports
         logger.info("Step 3: Generating reports...")
-        reports = self._generate_comprehensive_reports(validated_df)
+        priority_groups = self._select_priority_groups(validated_df)
+        reports = self._generate_comprehensive_reports(validated_df, priority_groups, analysis_time)
         
         # Step 4: Save all results
         logger.info("Step 4: Saving results...")
-        file_paths = self._save_all_results(validated_df, reports)
+        file_paths = self._save_all_results(validated_df, reports, priority_groups, analysis_time)
         
         self.results = {
             'dataframe': validated_df,
@@ -57,60 +83,67 @@ class IntegratedGaugeAnalyzer:
     
     def _add_external_validation(self, gauge_df: pd.DataFrame) -> pd.DataFrame:
         """Add external validation data to gauge dataframe"""
-        validation_results = []
-        
-        for _, gauge in gauge_df.iterrows():
-            gauge_data = {
-                'location': {
-                    'latitude': gauge['latitude'],
-                    'longitude': gauge['longitude']
-                }
-            }
-            
-            validation = self.validator.validate_gauge_against_external(gauge_data)
-            validation_results.append(validation)
+        status, boost, match_count, evidence = self.validator.validate_gauges_batch(
+            gauge_df['latitude'].to_numpy(), gauge_df['longitude'].to_numpy()
+        )
         
         # Add validation columns
-        gauge_df['validation_status'] = [v['validation_status'] for v in validation_results]
-        gauge_df['confidence_boost'] = [v['confidence_boost'] for v in validation_results]
-        gauge_df['external_matches'] = [len(v['matches']) for v in validation_results]
-        gauge_df['validation_evidence'] = ['; '.join(v['evidence']) for v in validation_results]
+        gauge_df['validation_status'] = status
+        gauge_df['confidence_boost'] = boost
+        gauge_df['external_matches'] = match_count
+        gauge_df['validation_evidence'] = evidence
         
         # Update confidence scores with validation boost
         gauge_df['final_confidence_score'] = gauge_df['confidenceScore'] + gauge_df['confidence_boost']
         gauge_df['final_confidence_score'] = gauge_df['final_confidence_score'].clip(0, 100)
         
         # Update classifications based on new confidence scores
-        def update_classification(row):
-            score = row['final_confidence_score']
-            if score >= 80:
-                return GaugeClassification.VERIFIED_PHYSICAL
-            elif score >= 60:
-                return GaugeClassification.LIKELY_PHYSICAL
-            elif score >= 30:
-                return GaugeClassification.UNCERTAIN
-            else:
-                return GaugeClassification.LIKELY_VIRTUAL
-        
-        gauge_df['final_classification'] = gauge_df.apply(update_classification, axis=1)
+        scores = gauge_df['final_confidence_score'].to_numpy()
+        gauge_df['final_classification'] = np.select(
+            [scores >= 80, scores >= 60, scores >= 30],
+            [GaugeClassification.VERIFIED_PHYSICAL, GaugeClassification.LIKELY_PHYSICAL,
+             GaugeClassification.UNCERTAIN],
+            default=GaugeClassification.LIKELY_VIRTUAL
+        )
+        
+        # Low-cardinality labels as categoricals so the report counts and groupbys work on codes
+        for col in ('source', 'classification', 'final_classification', 'validation_status'):
+            gauge_df[col] = gauge_df[col].astype('category')
         
         return gauge_df
     
-    def _generate_comprehensive_reports(self, validated_df: pd.DataFrame) -> Dict:
+    def _select_priority_groups(self, df: pd.DataFrame) -> Dict:
+        """Select the gauge subsets shared by the recommendations, markdown and CSV outputs"""
+        # Boolean masks computed once and reused for both the subsets and their counts
+        quality_verified = df['qualityVerified'].to_numpy(dtype=bool)
+        high_confidence = df['final_confidence_score'].to_numpy() >= 70
+        high_priority = high_confidence & quality_verified
+        uncertain = (df['final_classification'] == GaugeClassification.UNCERTAIN).to_numpy()
+        verified_hybas = (df['source'] == 'HYBAS').to_numpy() & quality_verified
+        
+        return {
+            'high_priority': df[high_priority],
+            'uncertain': df[uncertain],
+            'high_confidence_count': int(high_confidence.sum()),
+            'verified_hybas_count': int(verified_hybas.sum())
+        }
+    
+    def _generate_comprehensive_reports(self, validated_df: pd.DataFrame, priority_groups: Dict,
+                                        analysis_time: datetime) -> Dict:
         """Generate comprehensive analysis reports"""
         reports = {}
         
         # Basic statistics
         reports['basic_stats'] = {
             'total_gauges': len(validated_df),
-            'analysis_date': datetime.now().isoformat(),
+            'analysis_date': analysis_time.isoformat(),
             'api_key_used': self.api_key is not None
         }
         
         # Classification analysis
         reports['classification_analysis'] = {
-            'original_classification': validated_df['classification'].value_counts().to_dict(),
-            'final_classification': validated_df['final_classification'].value_counts().to_dict(),
+            'original_classification': _value_counts_dict(validated_df['classification']),
+            'final_classification': _value_counts_dict(validated_df['final_classification']),
             'confidence_distribution': {
                 'original_mean': float(validated_df['confidenceScore'].mean()),
                 'final_mean': float(validated_df['final_confidence_score'].mean()),
@@ -120,16 +153,23 @@ class IntegratedGaugeAnalyzer:
         }
         
         # Source analysis
+        source_totals = validated_df.groupby('source', observed=True).agg(
+            quality_verified=('qualityVerified', 'sum'),
+            has_model=('hasModel', 'sum')
+        )
         reports['source_analysis'] = {
-            'by_source': validated_df['source'].value_counts().to_dict(),
-            'quality_verified_by_source': validated_df.groupby('source')['qualityVerified'].sum().to_dict(),
-            'has_model_by_source': validated_df.groupby('source')['hasModel'].sum().to_dict()
+            'by_source': _value_counts_dict(validated_df['source']),
+            'quality_verified_by_source': source_totals['quality_verified'].to_dict(),
+            'has_model_by_source': source_totals['has_model'].to_dict()
         }
         
         # External validation analysis
+        match_counts = np.bincount(validated_df['external_matches'].to_numpy(dtype=np.int64))
         reports['validation_analysis'] = {
-            'validation_status_counts': validated_df['validation_status'].value_counts().to_dict(),
-            'external_matches_distribution': validated_df['external_matches'].value_counts().to_dict(),
+            'validation_status_counts': _value_counts_dict(validated_df['validation_status']),
+            'external_matches_distribution': {
+                matches: int(count) for matches, count in enumerate(match_counts) if count
+            },
             'validation_impact': {
                 'gauges_with_boost': int((validated_df['confidence_boost'] > 0).sum()),
                 'average_boost': float(validated_df['confidence_boost'].mean()),
@@ -138,10 +178,11 @@ class IntegratedGaugeAnalyzer:
         }
         
         # Geographic analysis
+        geographic_dist = self._analyze_geographic_distribution(validated_df)
         reports['geographic_analysis'] = {
             'latitude_range': [float(validated_df['latitude'].min()), float(validated_df['latitude'].max())],
             'longitude_range': [float(validated_df['longitude'].min()), float(validated_df['longitude'].max())],
-            'geographic_distribution': self._analyze_geographic_distribution(validated_df)
+            'geographic_distribution': geographic_dist
         }
         
         # Quality analysis
@@ -150,18 +191,18 @@ class IntegratedGaugeAnalyzer:
             'quality_verified_percentage': float(validated_df['qualityVerified'].mean() * 100),
             'has_model_count': int(validated_df['hasModel'].sum()),
             'has_model_percentage': float(validated_df['hasModel'].mean() * 100),
-            'high_confidence_gauges': int((validated_df['final_confidence_score'] >= 70).sum())
+            'high_confidence_gauges': priority_groups['high_confidence_count']
         }
         
         # Recommended actions
-        reports['recommendations'] = self._generate_recommendations(validated_df)
+        reports['recommendations'] = self._generate_recommendations(geographic_dist, priority_groups)
         
         # External stations summary
         external_stations_df = self.validator.get_all_external_stations()
         reports['external_stations_summary'] = {
             'total_external_stations': len(external_stations_df),
-            'by_source': external_stations_df['source'].value_counts().to_dict(),
-            'by_river': external_stations_df['river'].value_counts().to_dict()
+            'by_source': _value_counts_dict(external_stations_df['source']),
+            'by_river': _value_counts_dict(external_stations_df['river'])
         }
         
         return reports
@@ -175,53 +216,64 @@ class IntegratedGaugeAnalyzer:
             'Southern': {'lat_min': 23, 'lat_max': 28, 'lon_min': 60, 'lon_max': 72}
         }
         
+        # The latitude bands are disjoint, so one digitize assigns each gauge its only candidate region
+        by_lat = sorted(regions, key=lambda region: regions[region]['lat_min'])
+        lat_edges = [regions[region]['lat_min'] for region in by_lat] + [regions[by_lat[-1]]['lat_max']]
+        lon_min = np.array([regions[region]['lon_min'] for region in by_lat])
+        lon_max = np.array([regions[region]['lon_max'] for region in by_lat])
+        
+        lat = df['latitude'].to_numpy()
+        lon = df['longitude'].to_numpy()
+        band = np.digitize(lat, lat_edges) - 1
+        in_band = (band >= 0) & (band < len(by_lat))
+        band = np.where(in_band, band, 0)
+        in_region = in_band & (lon >= lon_min[band]) & (lon < lon_max[band])
+        
+        region_idx = band[in_region]
+        is_physical = df['final_classification'].isin([
+            GaugeClassification.VERIFIED_PHYSICAL,
+            GaugeClassification.LIKELY_PHYSICAL
+        ]).to_numpy()[in_region]
+        quality_verified = df['qualityVerified'].to_numpy(dtype=bool)[in_region]
+        
+        totals = np.bincount(region_idx, minlength=len(by_lat))
+        physical = np.bincount(region_idx, weights=is_physical, minlength=len(by_lat))
+        verified = np.bincount(region_idx, weights=quality_verified, minlength=len(by_lat))
+        
         distribution = {}
-        for region, bounds in regions.items():
-            mask = (
-                (df['latitude'] >= bounds['lat_min']) & 
-                (df['latitude'] < bounds['lat_max']) &
-                (df['longitude'] >= bounds['lon_min']) & 
-                (df['longitude'] < bounds['lon_max'])
-            )
-            region_df = df[mask]
+        for region in regions:
+            i = by_lat.index(region)
             distribution[region] = {
-                'total_gauges': len(region_df),
-                'physical_gauges': int((region_df['final_classification'].isin([
-                    GaugeClassification.VERIFIED_PHYSICAL, 
-                    GaugeClassification.LIKELY_PHYSICAL
-                ])).sum()),
-                'quality_verified': int(region_df['qualityVerified'].sum())
+                'total_gauges': int(totals[i]),
+                'physical_gauges': int(physical[i]),
+                'quality_verified': int(verified[i])
             }
         
         return distribution
     
-    def _generate_recommendations(self, df: pd.DataFrame) -> Dict:
-        """Generate recommendations based on analysis"""
+    def _generate_recommendations(self, geographic_dist: Dict, priority_groups: Dict) -> Dict:
+        """Generate recommendations from the regional distribution and priority gauge groups"""
         recommendations = {}
         
         # High priority gauges for Pak-FEWS
-        high_priority = df[
-            (df['final_confidence_score'] >= 70) & 
-            (df['qualityVerified'] == True)
-        ]
+        high_priority = priority_groups['high_priority']
         
         recommendations['high_priority_gauges'] = {
             'count': len(high_priority),
             'criteria': 'Confidence score >= 70 AND quality verified',
-            'gauge_ids': high_priority['gaugeId'].tolist()[:10]  # Top 10
+            'gauge_ids': high_priority['gaugeId'].head(10).tolist()  # Top 10
         }
         
         # Uncertain gauges needing verification
-        uncertain = df[df['final_classification'] == GaugeClassification.UNCERTAIN]
+        uncertain = priority_groups['uncertain']
         recommendations['verification_needed'] = {
             'count': len(uncertain),
             'action': 'Contact Google for clarification or verify locally',
-            'gauge_ids': uncertain['gaugeId'].tolist()[:5]  # Top 5
+            'gauge_ids': uncertain['gaugeId'].head(5).tolist()  # Top 5
         }
         
         # Coverage gaps
         low_coverage_regions = []
-        geographic_dist = self._analyze_geographic_distribution(df)
         for region, stats in geographic_dist.items():
             if stats['total_gauges'] < 10:  # Arbitrary threshold
                 low_coverage_regions.append(region)
@@ -234,58 +286,82 @@ class IntegratedGaugeAnalyzer:
         # System implementation recommendations
         recommendations['system_implementation'] = {
             'start_with_physical': f"Begin with {len(high_priority)} high-confidence physical gauges",
-            'include_quality_hybas': f"Include {len(df[(df['source'] == 'HYBAS') & (df['qualityVerified'] == True)])} quality-verified HYBAS gauges",
+            'include_quality_hybas': f"Include {priority_groups['verified_hybas_count']} quality-verified HYBAS gauges",
             'flag_uncertain': f"Flag {len(uncertain)} uncertain gauges with appropriate warnings",
             'user_feedback': "Implement user feedback system to improve classifications over time"
         }
         
         return recommendations
     
-    def _save_all_results(self, df: pd.DataFrame, reports: Dict) -> Dict:
-        """Save all analysis results to files"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    def _save_all_results(self, df: pd.DataFrame, reports: Dict, priority_groups: Dict,
+                          analysis_time: datetime) -> Dict:
+        """Save all analysis results to files, writing them concurrently"""
+        timestamp = analysis_time.strftime('%Y%m%d_%H%M%S')
         file_paths = {}
+        writes = []  # (callable, args, kwargs) triples, run on the thread pool below
         
         # Save main gauge inventory
         csv_filename = f'gauge_inventory_complete_{timestamp}.csv'
-        df.to_csv(csv_filename, index=False)
+        writes.append((self.gauge_analyzer.with_evidence_text(df).to_csv, (csv_filename,), {'index': False}))
         file_paths['gauge_inventory'] = csv_filename
         
+        # Columnar copy of the inventory for downstream tooling
+        if _PYARROW_AVAILABLE:
+            parquet_filename = f'gauge_inventory_complete_{timestamp}.parquet'
+            writes.append((df.to_parquet, (parquet_filename,), {'compression': 'zstd', 'index': False}))
+            file_paths['gauge_inventory_parquet'] = parquet_filename
+        
         # Save comprehensive analysis report
         json_filename = f'comprehensive_analysis_{timestamp}.json'
-        with open(json_filename, 'w') as f:
-            json.dump(reports, f, indent=2, default=str)
+        writes.append((_write_json, (json_filename, reports), {}))
         file_paths['analysis_report'] = json_filename
         
         # Save high-priority gauges
-        high_priority = df[
-            (df['final_confidence_score'] >= 70) & 
-            (df['qualityVerified'] == True)
-        ]
+        high_priority = priority_groups['high_priority']
         high_priority_filename = f'high_priority_gauges_{timestamp}.csv'
-        high_priority.to_csv(high_priority_filename, index=False)
+        writes.append((self.gauge_analyzer.with_evidence_text(high_priority).to_csv, (high_priority_filename,), {'index': False}))
         file_paths['high_priority_gauges'] = high_priority_filename
         
         # Save external stations reference
         external_df = self.validator.get_all_external_stations()
         external_filename = f'external_stations_reference_{timestamp}.csv'
-        external_df.to_csv(external_filename, index=False)
+        writes.append((external_df.to_csv, (external_filename,), {'index': False}))
         file_paths['external_stations'] = external_filename
         
         # Save research findings markdown
         findings_filename = f'research_findings_{timestamp}.md'
-        self._generate_research_findings_md(df, reports, findings_filename)
+        group_counts = self._final_group_counts(reports['classification_analysis']['final_classification'])
+        writes.append((self._generate_research_findings_md,
+                       (reports, findings_filename, analysis_time, group_counts,
+                        priority_groups['verified_hybas_count']), {}))
         file_paths['research_findings'] = findings_filename
         
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(write, *args, **kwargs) for write, args, kwargs in writes]
+            for future in futures:
+                future.result()  # re-raise any write error
+        
         return file_paths
     
-    def _generate_research_findings_md(self, df: pd.DataFrame, reports: Dict, filename: str):
+    @staticmethod
+    def _final_group_counts(final_counts: Dict) -> Dict:
+        """Collapse final classification counts into physical / uncertain / virtual groups"""
+        return {
+            'physical': (final_counts.get(GaugeClassification.VERIFIED_PHYSICAL, 0)
+                         + final_counts.get(GaugeClassification.LIKELY_PHYSICAL, 0)),
+            'uncertain': final_counts.get(GaugeClassification.UNCERTAIN, 0),
+            'virtual': final_counts.get(GaugeClassification.LIKELY_VIRTUAL, 0)
+        }
+    
+    def _generate_research_findings_md(self, reports: Dict, filename: str, analysis_time: datetime,
+                                       group_counts: Dict, verified_hybas_count: int):
         """Generate comprehensive research findings markdown report"""
-        content = f"""# Pakistan Flood Hub Gauge Analysis - Research Findings
+        analysis_date = analysis_time.strftime('%Y-%m-%d %H:%M:%S')
+        parts = [f"""# Pakistan Flood Hub Gauge Analysis - Research Findings
 
 ## Executive Summary
 
-Analysis completed on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} covering {reports['basic_stats']['total_gauges']} gauges within Pakistan's boundaries.
+Analysis completed on {analysis_date} covering {reports['basic_stats']['total_gauges']} gauges within Pakistan's boundaries.
 
 ## Key Findings
 
@@ -295,29 +371,33 @@ Analysis completed on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} covering {r
 - **With Flood Models**: {reports['quality_analysis']['has_model_count']} ({reports['quality_analysis']['has_model_percentage']:.1f}%)
 
 ### 2. Classification Results
-- **Verified/Likely Physical**: {reports['classification_analysis']['final_classification'].get('verified_physical', 0) + reports['classification_analysis']['final_classification'].get('likely_physical', 0)}
-- **Uncertain**: {reports['classification_analysis']['final_classification'].get('uncertain', 0)}
-- **Likely Virtual**: {reports['classification_analysis']['final_classification'].get('likely_virtual', 0)}
+- **Verified/Likely Physical**: {group_counts['physical']}
+- **Uncertain**: {group_counts['uncertain']}
+- **Likely Virtual**: {group_counts['virtual']}
 
 ### 3. Data Sources
-"""
+"""]
         
-        for source, count in reports['source_analysis']['by_source'].items():
-            content += f"- **{source}**: {count} gauges\n"
+        parts.extend(
+            f"- **{source}**: {count} gauges\n"
+            for source, count in reports['source_analysis']['by_source'].items()
+        )
         
-        content += f"""
+        parts.append(f"""
 ### 4. External Validation Results
 - **Gauges with External Matches**: {reports['validation_analysis']['validation_impact']['gauges_with_boost']}
 - **Average Confidence Boost**: {reports['validation_analysis']['validation_impact']['average_boost']:.1f} points
 - **Total External Stations Referenced**: {reports['external_stations_summary']['total_external_stations']}
 
 ### 5. Geographic Distribution
-"""
+""")
         
-        for region, stats in reports['geographic_analysis']['geographic_distribution'].items():
-            content += f"- **{region} Pakistan**: {stats['total_gauges']} total, {stats['physical_gauges']} likely physical\n"
+        parts.extend(
+            f"- **{region} Pakistan**: {stats['total_gauges']} total, {stats['physical_gauges']} likely physical\n"
+            for region, stats in reports['geographic_analysis']['geographic_distribution'].items()
+        )
         
-        content += f"""
+        parts.append(f"""
 ## Detailed Analysis
 
 ### Quality Assessment
@@ -325,14 +405,14 @@ The analysis reveals that {reports['quality_analysis']['quality_verified_percent
 
 ### Source Analysis
 The gauge network includes data from multiple sources:
-"""
+""")
         
         for source, count in reports['source_analysis']['by_source'].items():
             quality_count = reports['source_analysis']['quality_verified_by_source'].get(source, 0)
             model_count = reports['source_analysis']['has_model_by_source'].get(source, 0)
-            content += f"- **{source}**: {count} gauges ({quality_count} quality verified, {model_count} with models)\n"
+            parts.append(f"- **{source}**: {count} gauges ({quality_count} quality verified, {model_count} with models)\n")
         
-        content += f"""
+        parts.append(f"""
 ### External Validation Impact
 Cross-referencing with Pakistani government databases revealed:
 - {reports['validation_analysis']['validation_impact']['gauges_with_boost']} gauges matched with external stations
@@ -348,7 +428,7 @@ Start with {reports['recommendations']['high_priority_gauges']['count']} gauges
 - Examples: {', '.join(reports['recommendations']['high_priority_gauges']['gauge_ids'][:3]) if reports['recommendations']['high_priority_gauges']['gauge_ids'] else 'None available'}
 
 ### Phase 2: Verified HYBAS Gauges
-Include {len(df[(df['source'] == 'HYBAS') & (df['qualityVerified'] == True)])} HYBAS gauges with quality verification.
+Include {verified_hybas_count} HYBAS gauges with quality verification.
 
 ### Phase 3: Uncertain Gauges
 {reports['recommendations']['verification_needed']['count']} gauges need additional verification through:
@@ -390,11 +470,11 @@ This analysis provides a systematic approach to identifying physical vs. virtual
 
 ---
 *Report generated by Pakistan Flood Hub Gauge Analyzer*
-*Analysis date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-"""
+*Analysis date: {analysis_date}*
+""")
         
         with open(filename, 'w') as f:
-            f.write(content)
+            f.writelines(parts)
     
     def print_summary(self):
         """Print analysis summary to console"""
@@ -9,6 +9,32 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 import re
 from datetime import datetime
+from pathlib import Path
+
+_NUMBERED = re.compile(r'^\d+\. ')
+
+def add_inline_paragraph(doc, line):
+    """Add a regular paragraph, rendering **bold** spans as bold runs"""
+    p = doc.add_paragraph()
+    
+    # Plain lines (the common case) are a single run
+    if '**' not in line:
+        p.add_run(line)
+        return p
+    
+    # Split by ** for bold formatting
+    parts = line.split('**')
+    for j, part in enumerate(parts):
+        if j % 2 == 0:
+            # Regular text
+            if part:
+                p.add_run(part)
+        else:
+            # Bold text
+            if part:
+                run = p.add_run(part)
+                run.bold = True
+    return p
 
 def create_word_document(markdown_file, output_file):
     """Convert markdown to Word document with proper formatting"""
@@ -24,12 +50,12 @@ def create_word_document(markdown_file, output_file):
         section.left_margin = Inches(1)
         section.right_margin = Inches(1)
     
-    # Read markdown content
-    with open(markdown_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Resolve list styles once instead of looking them up by name per item
+    bullet_style = doc.styles['List Bullet']
+    number_style = doc.styles['List Number']
     
-    # Split content into lines
-    lines = content.split('\n')
+    # Read markdown content as lines
+    lines = Path(markdown_file).read_text(encoding='utf-8').splitlines()
     
     # Process each line
     i = 0
@@ -42,34 +68,40 @@ def create_word_document(markdown_file, output_file):
             i += 1
             continue
             
-        if line.startswith('# '):
-            # Main heading (H1)
-            heading = line[2:].strip()
-            h = doc.add_heading(heading, level=1)
-            h.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-        elif line.startswith('## '):
-            # Section heading (H2)
-            heading = line[3:].strip()
-            doc.add_heading(heading, level=2)
-            
-        elif line.startswith('### '):
-            # Subsection heading (H3)
-            heading = line[4:].strip()
-            doc.add_heading(heading, level=3)
-            
-        elif line.startswith('#### '):
-            # Sub-subsection heading (H4)
-            heading = line[5:].strip()
-            doc.add_heading(heading, level=4)
+        # Dispatch on the first character so most lines skip the other prefix checks
+        first = line[0]
+        if first == '#':
+            if line.startswith('# '):
+                # Main heading (H1)
+                heading = line[2:].strip()
+                h = doc.add_heading(heading, level=1)
+                h.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                
+            elif line.startswith('## '):
+                # Section heading (H2)
+                heading = line[3:].strip()
+                doc.add_heading(heading, level=2)
+                
+            elif line.startswith('### '):
+                # Subsection heading (H3)
+                heading = line[4:].strip()
+                doc.add_heading(heading, level=3)
+                
+            elif line.startswith('#### '):
+                # Sub-subsection heading (H4)
+                heading = line[5:].strip()
+                doc.add_heading(heading, level=4)
+                
+            else:
+                add_inline_paragraph(doc, line)
             
-        elif line.startswith('**') and line.endswith('**'):
+        elif first == '*' and line.startswith('**') and line.endswith('**'):
             # Bold standalone line
             p = doc.add_paragraph()
             run = p.add_run(line[2:-2])
             run.bold = True
             
-        elif line.startswith('- ') or line.startswith('* '):
+        elif (first == '-' or first == '*') and line[1:2] == ' ':
             # Bullet point - collect all consecutive bullets
             bullets = []
             while i < len(lines) and (lines[i].strip().startswith('- ') or lines[i].strip().startswith('* ')):
@@ -79,27 +111,30 @@ def create_word_document(markdown_file, output_file):
             
             # Add all bullets
             for bullet in bullets:
-                p = doc.add_paragraph(bullet, style='List Bullet')
+                p = doc.add_paragraph(bullet, style=bullet_style)
             
             # Continue without incrementing i (already done in loop)
             continue
             
-        elif line.startswith('1. ') or re.match(r'^\d+\. ', line):
+        elif first.isdigit() and _NUMBERED.match(line):
             # Numbered list - collect all consecutive numbers
             numbers = []
-            while i < len(lines) and re.match(r'^\d+\. ', lines[i].strip()):
-                number_text = re.sub(r'^\d+\. ', '', lines[i].strip())
-                numbers.append(number_text)
+            while i < len(lines):
+                item = lines[i].strip()
+                match = _NUMBERED.match(item)
+                if not match:
+                    break
+                numbers.append(item[match.end():])
                 i += 1
             
             # Add all numbered items
             for number in numbers:
-                p = doc.add_paragraph(number, style='List Number')
+                p = doc.add_paragraph(number, style=number_style)
             
             # Continue without incrementing i
             continue
             
-        elif line.startswith('|') and '|' in line[1:]:
+        elif first == '|' and '|' in line[1:]:
             # Table - collect all table rows
             table_rows = []
             while i < len(lines) and lines[i].strip().startswith('|'):
@@ -109,12 +144,13 @@ def create_word_document(markdown_file, output_file):
                 i += 1
             
             if table_rows:
-                # Create table
-                table = doc.add_table(rows=1, cols=len(table_rows[0]))
+                # Create the table at full size in one allocation
+                table = doc.add_table(rows=len(table_rows), cols=len(table_rows[0]))
                 table.style = 'Table Grid'
+                rows = table.rows
                 
                 # Add header row
-                header_cells = table.rows[0].cells
+                header_cells = rows[0].cells
                 for j, cell_text in enumerate(table_rows[0]):
                     header_cells[j].text = cell_text
                     # Make header bold
@@ -122,9 +158,9 @@ def create_word_document(markdown_file, output_file):
                         for run in paragraph.runs:
                             run.bold = True
                 
-                # Add data rows
-                for row_data in table_rows[1:]:
-                    row_cells = table.add_row().cells
+                # Fill data rows
+                for r, row_data in enumerate(table_rows[1:], start=1):
+                    row_cells = rows[r].cells
                     for j, cell_text in enumerate(row_data):
                         if j < len(row_cells):
                             row_cells[j].text = cell_text
@@ -132,11 +168,11 @@ def create_word_document(markdown_file, output_file):
             # Continue without incrementing i
             continue
             
-        elif line.startswith('---'):
+        elif first == '-' and line.startswith('---'):
             # Horizontal rule - add page break or line
             doc.add_page_break()
             
-        elif line.startswith('```'):
+        elif first == '`' and line.startswith('```'):
             # Code block - collect until closing ```
             code_lines = []
             i += 1
@@ -151,23 +187,8 @@ def create_word_document(markdown_file, output_file):
                 p.style = 'Intense Quote'
             
         else:
-            # Regular paragraph
-            if line:
-                # Process inline formatting
-                p = doc.add_paragraph()
-                
-                # Split by ** for bold formatting
-                parts = line.split('**')
-                for j, part in enumerate(parts):
-                    if j % 2 == 0:
-                        # Regular text
-                        if part:
-                            p.add_run(part)
-                    else:
-                        # Bold text
-                        if part:
-                            run = p.add_run(part)
-                            run.bold = True
+            # Regular paragraph with inline formatting
+            add_inline_paragraph(doc, line)
         
         i += 1
     
@@ -6,40 +6,65 @@ Handles API setup and runs comprehensive analysis
 
 import sys
 import os
-from pathlib import Path
+
+REQUIRED_FILES = (
+    'comprehensive_flood_analyzer.py',
+    'config.py',
+    'requirements.txt'
+)
 
 def check_environment():
     """Check if environment is properly set up"""
-    required_files = [
-        'comprehensive_flood_analyzer.py',
-        'config.py',
-        'requirements.txt'
-    ]
-    
-    missing_files = [f for f in required_files if not Path(f).exists()]
-    if missing_files:
-        print(f"❌ Missing required files: {missing_files}")
-        return False
-    
     # Check virtual environment
     if sys.prefix == sys.base_prefix:
         print("⚠️ Virtual environment not activated")
         print("Run: source venv/bin/activate")
         return False
     
+    # Stop at the first missing file
+    for f in REQUIRED_FILES:
+        if not os.path.isfile(f):
+            print(f"❌ Missing required file: {f}")
+            return False
+    
     return True
 
+# (inputs, result) of the last check_api_setup call
+_api_setup_cache = (None, None)
+
 def check_api_setup():
-    """Check if API is configured"""
+    """Check if API is configured
+    
+    The result is cached against the .env mtime and the API key environment
+    variables; when any of them change, config re-reads the key so one saved
+    by setup is picked up.
+    """
+    global _api_setup_cache
+    try:
+        env_mtime = os.stat('.env').st_mtime_ns
+    except FileNotFoundError:
+        env_mtime = 0
+    inputs = (env_mtime, os.getenv('GOOGLE_FLOOD_HUB_API_KEY'), os.getenv('FLOOD_API_KEY'))
+    if _api_setup_cache[0] == inputs:
+        return _api_setup_cache[1]
+    
     try:
-        from config import config
-        return config.is_configured()
+        import config as config_module
+        if _api_setup_cache[0] is not None:
+            config_module.config.reload()
+        configured = config_module.config.is_configured()
     except ImportError:
-        return False
+        configured = False
+    
+    _api_setup_cache = (inputs, configured)
+    return configured
 
 def main():
     """Main execution with setup checks"""
     
+    # Flush progress output per line when piped to a log or CI
+    sys.stdout.reconfigure(line_buffering=True)
+    
     print("🌊 Pakistan Flood Hub Analyzer")
     print("=" * 40)
     
@@ -50,13 +75,18 @@ def main():
     # Check API setup
     if not check_api_setup():
         print("🔧 API not configured. Running setup...")
-        os.system("python3 setup_api.py")
+        # Run setup in-process so a key it sets in os.environ is visible to this run
+        import setup_api
+        setup_api.main()
         
-        # Recheck after setup
+        # Recheck after setup; config is reloaded if setup saved a key
         if not check_api_setup():
-            print("\n⚠️ Proceeding with sample data (no API key)")
-            response = input("Continue? (Y/n): ")
-            if response.lower() == 'n':
+            if sys.stdin.isatty():
+                proceed = setup_api.yesno("\n⚠️ Proceeding with sample data (no API key)\nContinue? (Y/n): ")
+            else:
+                print("\n⚠️ Proceeding with sample data (no API key)")
+                proceed = not os.getenv('FLOOD_CONTINUE_WITHOUT_API', 'y').strip().lower().startswith('n')
+            if not proceed:
                 sys.exit(1)
     else:
         print("✅ API configured - using live Google Flood Hub data")
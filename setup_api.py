@@ -5,7 +5,50 @@ Setup script for configuring Google Flood Hub API access
 
 import os
 import sys
-from pathlib import Path
+
+_session = None
+
+# Full Pakistan bounds, and a 0.1° box used when only the status code matters
+PAKISTAN_AREA = "23.5,60.5,37.5,77.5"
+PROBE_AREA = "23.5,60.5,23.6,60.6"
+
+# Request pieces built once per base URL / API key
+_URL_CACHE = {}
+_PARAMS_CACHE = {}
+
+def _get_session():
+    """Return the shared HTTP session, creating it on first use"""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        _session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        _session.headers.update({'Accept-Encoding': 'gzip'})
+    return _session
+
+def _gauges_url(config):
+    """Return the gauge area search URL for config's base URL"""
+    url = _URL_CACHE.get(config.base_url)
+    if url is None:
+        url = f"{config.base_url}/v1/gauges:searchGaugesByArea"
+        _URL_CACHE[config.base_url] = url
+    return url
+
+def _base_params(config):
+    """Return the query parameters shared by every request for config's API key"""
+    params = _PARAMS_CACHE.get(config.api_key)
+    if params is None:
+        params = config.get_params()
+        _PARAMS_CACHE[config.api_key] = params
+    return params
+
+def yesno(prompt, default=True):
+    """Ask a yes/no question; an empty answer returns default"""
+    answer = input(prompt).strip().lower()
+    if not answer:
+        return default
+    return answer[0] == 'y'
 
 def setup_api_key():
     """Interactive setup for Google Flood Hub API key"""
@@ -15,35 +58,45 @@ def setup_api_key():
     
     # Check if already configured
     existing_key = os.getenv('GOOGLE_FLOOD_HUB_API_KEY')
+    
+    # No one to prompt (CI, Docker): use whatever the environment provides
+    if not sys.stdin.isatty():
+        if existing_key:
+            print("Non-interactive session, using API key from environment.")
+        else:
+            print("Non-interactive session and GOOGLE_FLOOD_HUB_API_KEY is not set.")
+        return existing_key
+    
     if existing_key:
-        print(f"✅ API key already found in environment: {existing_key[:10]}...")
-        response = input("Would you like to update it? (y/N): ")
-        if response.lower() != 'y':
+        if not yesno(f"✅ API key already found in environment: {existing_key[:10]}...\n"
+                     "Would you like to update it? (y/N): ", default=False):
             print("Using existing API key.")
             return existing_key
     
-    print("\n📋 To get your Google Flood Hub API key:")
-    print("1. Go to: https://console.cloud.google.com/")
-    print("2. Create or select a project")
-    print("3. Enable the Google Flood Hub API")
-    print("4. Go to 'APIs & Services' > 'Credentials'")
-    print("5. Click 'Create Credentials' > 'API Key'")
-    print("6. Copy the generated key")
+    print("\n📋 To get your Google Flood Hub API key:\n"
+          "1. Go to: https://console.cloud.google.com/\n"
+          "2. Create or select a project\n"
+          "3. Enable the Google Flood Hub API\n"
+          "4. Go to 'APIs & Services' > 'Credentials'\n"
+          "5. Click 'Create Credentials' > 'API Key'\n"
+          "6. Copy the generated key")
     
-    print("\n🔑 Enter your Google Flood Hub API key:")
-    api_key = input("API Key: ").strip()
+    api_key = input("\n🔑 Enter your Google Flood Hub API key:\nAPI Key: ").strip()
     
     if not api_key:
         print("❌ No API key provided. Exiting.")
         return None
     
     # Choose storage method
-    print("\n💾 How would you like to store the API key?")
-    print("1. Environment variable (recommended for production)")
-    print("2. .env file (convenient for development)")
-    print("3. Both")
+    choice = input("\n💾 How would you like to store the API key?\n"
+                   "1. Environment variable (recommended for production)\n"
+                   "2. .env file (convenient for development)\n"
+                   "3. Both\n"
+                   "Choose option (1-3): ").strip()
     
-    choice = input("Choose option (1-3): ").strip()
+    if choice not in ['1', '2', '3']:
+        print("❌ Invalid option. API key not stored.")
+        return None
     
     if choice in ['1', '3']:
         # Set environment variable
@@ -55,30 +108,49 @@ def setup_api_key():
         print(f"export GOOGLE_FLOOD_HUB_API_KEY='{api_key}'")
     
     if choice in ['2', '3']:
-        # Create .env file
-        env_path = Path('.env')
-        with open(env_path, 'w') as f:
-            f.write(f"GOOGLE_FLOOD_HUB_API_KEY={api_key}\n")
+        # Create .env file atomically and readable only by the owner;
+        # mkstemp always creates a fresh 0600 file, whatever is lying around
+        import tempfile
+        env_path = '.env'
+        fd, tmp_path = tempfile.mkstemp(dir='.', prefix='.env.', suffix='.tmp')
+        try:
+            try:
+                os.write(fd, f"GOOGLE_FLOOD_HUB_API_KEY={api_key}\n".encode())
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, env_path)
+        except BaseException:
+            # Never leave a stray copy of the key behind
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
         print(f"✅ API key saved to {env_path}")
         
-        # Add .env to .gitignore if it exists
-        gitignore_path = Path('.gitignore')
-        if gitignore_path.exists():
+        # Keep .env and its temp files out of git, creating .gitignore if needed
+        gitignore_path = '.gitignore'
+        try:
             with open(gitignore_path, 'r') as f:
                 content = f.read()
-            if '.env' not in content:
-                with open(gitignore_path, 'a') as f:
-                    f.write('\n.env\n')
-                print("✅ Added .env to .gitignore")
-        else:
-            with open(gitignore_path, 'w') as f:
-                f.write('.env\n')
-            print("✅ Created .gitignore with .env")
+        except FileNotFoundError:
+            content = ''
+        # Match whole lines: '.env*.tmp' or '.env.example' must not count as '.env'
+        listed = {line.strip() for line in content.splitlines()}
+        missing = [entry for entry in ('.env', '.env*.tmp') if entry not in listed]
+        if missing:
+            lines = ''.join(f"{entry}\n" for entry in missing)
+            with open(gitignore_path, 'a') as f:
+                f.write(f"\n{lines}" if content else lines)
+            if content:
+                print(f"✅ Added {', '.join(missing)} to .gitignore")
+            else:
+                print(f"✅ Created .gitignore with {', '.join(missing)}")
     
     return api_key
 
-def test_api_connection():
-    """Test the API connection"""
+def test_api_connection(verbose=False):
+    """Test the API connection; with verbose, also count the gauges in Pakistan"""
     print("\n🔍 Testing API connection...")
     
     try:
@@ -91,29 +163,32 @@ def test_api_connection():
         import requests
         
         # Test with a simple API call
-        url = f"{config.base_url}/v1/gauges:searchGaugesByArea"
-        params = config.get_params({
-            "area": "23.5,60.5,37.5,77.5"  # Pakistan bounds
-        })
+        url = _gauges_url(config)
+        params = {**_base_params(config), "area": PAKISTAN_AREA if verbose else PROBE_AREA}
         
         print(f"Testing: {url}")
-        response = requests.get(url, params=params, timeout=10)
+        # Stream so the body is only downloaded when we actually read it
+        response = _get_session().get(url, params=params, timeout=5, stream=True)
         
-        if response.status_code == 200:
-            data = response.json()
-            gauge_count = len(data.get('gauges', []))
-            print(f"✅ API connection successful!")
-            print(f"📊 Found {gauge_count} gauges in Pakistan region")
-            return True
-        elif response.status_code == 401:
-            print("❌ Authentication failed - check your API key")
-            return False
-        elif response.status_code == 403:
-            print("❌ API access forbidden - ensure Flood Hub API is enabled")
-            return False
-        else:
-            print(f"⚠️ API returned status {response.status_code}: {response.text}")
-            return False
+        try:
+            if response.status_code == 200:
+                print(f"✅ API connection successful!")
+                if verbose:
+                    import orjson
+                    gauge_count = len(orjson.loads(response.content).get('gauges', []))
+                    print(f"📊 Found {gauge_count} gauges in Pakistan region")
+                return True
+            elif response.status_code == 401:
+                print("❌ Authentication failed - check your API key")
+                return False
+            elif response.status_code == 403:
+                print("❌ API access forbidden - ensure Flood Hub API is enabled")
+                return False
+            else:
+                print(f"⚠️ API returned status {response.status_code}: {response.text}")
+                return False
+        finally:
+            response.close()
             
     except requests.exceptions.RequestException as e:
         print(f"❌ Network error: {e}")
@@ -122,8 +197,8 @@ def test_api_connection():
         print(f"❌ Error: {e}")
         return False
 
-def main():
-    """Main setup process"""
+def main(verbose=False):
+    """Main setup process; verbose also counts the gauges during the API test"""
     
     print("🚀 Starting API setup process...\n")
     
@@ -131,13 +206,18 @@ def main():
     api_key = setup_api_key()
     
     if api_key:
+        # The key is stored by now; hand it straight to the shared config
+        # instead of re-reading it
+        from config import config
+        config.reload(api_key=api_key)
+        
         # Test connection
-        if test_api_connection():
-            print("\n🎉 Setup completed successfully!")
-            print("\nNext steps:")
-            print("1. Run: python3 comprehensive_flood_analyzer.py")
-            print("2. The system will now use live Google Flood Hub data")
-            print("3. Check generated reports for real Pakistani gauge data")
+        if test_api_connection(verbose=verbose):
+            print("\n🎉 Setup completed successfully!\n"
+                  "\nNext steps:\n"
+                  "1. Run: python3 comprehensive_flood_analyzer.py\n"
+                  "2. The system will now use live Google Flood Hub data\n"
+                  "3. Check generated reports for real Pakistani gauge data")
         else:
             print("\n⚠️ Setup completed but API test failed")
             print("Please check your API key and try again")
@@ -146,4 +226,9 @@ def main():
         print("You can run the system without an API key using sample data")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description='Configure Google Flood Hub API access')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Fetch the full Pakistan gauge list when testing the API')
+    args = parser.parse_args()
+    main(verbose=args.verbose)
\ No newline at end of file